@@ -1,23 +1,26 @@
 import os
-import librosa
 import numpy as np
 import pretty_midi
-from music21 import converter
 from fastdtw import fastdtw
 from scipy.spatial.distance import euclidean
-import soundfile as sf
-from mt3 import models
-from mt3 import infer
-from mt3 import data
+from alignedcorpus import ShardWriter
+from instrument import profiler
 
 # Convert MP3 to WAV
+@profiler.timed("convert_mp3_to_wav")
 def convert_mp3_to_wav(mp3_path, wav_path):
+    import librosa
+    import soundfile as sf
     y, sr = librosa.load(mp3_path, sr=None)
     sf.write(wav_path, y, sr)
+    profiler.count("convert_mp3_to_wav", items=len(y), nbytes=os.path.getsize(mp3_path))
     print(f"Converted {mp3_path} to {wav_path}")
 
 # Transcribe WAV to MIDI (placeholder for MT3)
+@profiler.timed("transcribe_audio_to_midi")
 def transcribe_audio_to_midi(wav_path, midi_output_path="transcription.mid"):
+    # Heavy optional stack, imported here so the alignment code can be used without it
+    from mt3 import models, infer, data
     print("Loading MT3 model...")
     model = models.load_model()
     print(f"Loading audio {wav_path}")
@@ -30,7 +33,9 @@ def transcribe_audio_to_midi(wav_path, midi_output_path="transcription.mid"):
     return pretty_midi.PrettyMIDI(midi_output_path)
 
 # Convert MusicXML to MIDI
+@profiler.timed("convert_musicxml_to_midi")
 def convert_musicxml_to_midi(musicxml_path, midi_output_path="score.mid"):
+    from music21 import converter
     score = converter.parse(musicxml_path)
     score.write("midi", fp=midi_output_path)
     return pretty_midi.PrettyMIDI(midi_output_path)
@@ -47,6 +52,7 @@ def extract_midi_features(midi):
     return onsets, pitches
 
 # Align two MIDIs with DTW
+@profiler.timed("align_midis")
 def align_midis(score_midi, perf_midi):
     print("Aligning MIDI files...")
     score_onsets, score_pitches = extract_midi_features(score_midi)
@@ -56,25 +62,40 @@ def align_midis(score_midi, perf_midi):
     perf_features = np.column_stack((perf_pitches, perf_onsets / max(perf_onsets)))
     
     distance, path = fastdtw(score_features, perf_features, dist=euclidean)
+    profiler.count("align_midis", items=len(score_onsets) + len(perf_onsets))
     alignment = list(zip(*path))
     return alignment, score_onsets, perf_onsets, score_pitches, perf_pitches
 
 # Save alignment to CSV
+@profiler.timed("save_alignment")
 def save_alignment(alignment, score_onsets, perf_onsets, score_pitches, perf_pitches, output_path):
     with open(output_path, 'w') as f:
         f.write("Score_Onset,Score_Pitch,Performance_Onset,Performance_Pitch\n")
-        for s_idx, p_idx in alignment:
+        for s_idx, p_idx in zip(*alignment):
             f.write(f"{score_onsets[s_idx]},{score_pitches[s_idx]},{perf_onsets[p_idx]},{perf_pitches[p_idx]}\n")
     print(f"Saved alignment to {output_path}")
 
 # Pipeline
-mp3_path = "downloads/lovedream.mp3"
-musicxml_path = "downloads/Liebestraum_No._3_in_A_Major.mxl"
-wav_path = "lovedream.wav"
-output_alignment = "lovedream_alignment.csv"
+if __name__ == "__main__":
+    mp3_path = "downloads/lovedream.mp3"
+    musicxml_path = "downloads/Liebestraum_No._3_in_A_Major.mxl"
+    wav_path = "lovedream.wav"
+    output_alignment = "lovedream_alignment.csv"
+    corpus_dir = "corpus"
+    piece_id = "lovedream"
 
-convert_mp3_to_wav(mp3_path, wav_path)
-perf_midi = transcribe_audio_to_midi(wav_path)  # Replace with MT3 transcription
-score_midi = convert_musicxml_to_midi(musicxml_path)
-alignment, score_onsets, perf_onsets, score_pitches, perf_pitches = align_midis(score_midi, perf_midi)
-save_alignment(alignment, score_onsets, perf_onsets, score_pitches, perf_pitches, output_alignment)
+    # Open the corpus first so a mismatch or an already exported piece shows up before the slow steps
+    with ShardWriter(corpus_dir, append=True) as writer:
+        if piece_id in writer.pieces:
+            print(f"{piece_id} is already in {corpus_dir}; skipping")
+        else:
+            convert_mp3_to_wav(mp3_path, wav_path)
+            perf_midi = transcribe_audio_to_midi(wav_path)  # Replace with MT3 transcription
+            score_midi = convert_musicxml_to_midi(musicxml_path)
+            alignment, score_onsets, perf_onsets, score_pitches, perf_pitches = align_midis(score_midi, perf_midi)
+            save_alignment(alignment, score_onsets, perf_onsets, score_pitches, perf_pitches, output_alignment)
+
+            # Pack decoded audio, notes and alignment into memory-mapped shards for training
+            writer.add_piece(piece_id, mp3_path, score_midi, perf_midi, alignment)
+            print(f"Exported {piece_id} to {corpus_dir}")
+    profiler.emit()
@@ -0,0 +1,349 @@
+"""
+Sharded, memory-mapped export of the aligned corpus.
+
+save_alignment() leaves one CSV per piece and the audio still has to be decoded
+on every pass. This packs decoded audio (resampled to one fixed rate), the score
+and performance note arrays and the DTW alignment into a handful of flat binary
+shards plus an index.json, so loaders can np.memmap them and slice pieces and
+time ranges without decoding or parsing anything.
+
+Layout of an export directory
+  index.json                    sample rate, dtypes, shard files, per-piece offsets
+  shard-00000.audio.f32         mono float32 samples
+  shard-00000.score_notes.bin   NOTE_DTYPE records, sorted by (start, pitch)
+  shard-00000.perf_notes.bin    NOTE_DTYPE records, sorted by (start, pitch)
+  shard-00000.alignment.bin     ALIGN_DTYPE records, in DTW path order
+  ...
+
+A new shard is started once the current one reaches shard_bytes. Pieces are
+never split across shards, so a single piece longer than shard_bytes gets a
+shard of its own. ShardWriter(..., append=True) reopens an existing export and
+keeps filling its last shard.
+"""
+
+import os
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from instrument import profiler
+
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+DEFAULT_SAMPLE_RATE = 16000
+DEFAULT_SHARD_BYTES = 256 * 1024 * 1024
+
+AUDIO_DTYPE = np.dtype("<f4")
+NOTE_DTYPE = np.dtype([
+    ("start", "<f8"),
+    ("end", "<f8"),
+    ("pitch", "<i2"),
+    ("velocity", "<i2"),
+])
+ALIGN_DTYPE = np.dtype([
+    ("score_index", "<i4"),
+    ("perf_index", "<i4"),
+    ("score_onset", "<f8"),
+    ("perf_onset", "<f8"),
+])
+
+# stream name -> (file suffix, dtype)
+STREAMS = {
+    "audio": ("audio.f32", AUDIO_DTYPE),
+    "score_notes": ("score_notes.bin", NOTE_DTYPE),
+    "perf_notes": ("perf_notes.bin", NOTE_DTYPE),
+    "alignment": ("alignment.bin", ALIGN_DTYPE),
+}
+
+
+def dtype_descr(dtype: np.dtype):
+    return dtype.descr if dtype.fields else dtype.str
+
+
+def check_index(index: dict, root: str):
+    """Raise ValueError if index.json was written with a different version or dtypes."""
+    if index.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported corpus version in {root}: {index.get('version')}")
+    stored = index.get("dtypes", {})
+    for stream, (_, dtype) in STREAMS.items():
+        descr = stored.get(stream)
+        # JSON turns the (name, type) tuples of a structured descr into lists
+        found = np.dtype([tuple(f) for f in descr] if isinstance(descr, list) else descr) \
+            if descr is not None else None
+        if found != dtype:
+            raise ValueError(f"{root}: {stream} stored as {descr}, expected {dtype_descr(dtype)}")
+
+
+def notes_from_midi(midi) -> np.ndarray:
+    """
+    Flatten a PrettyMIDI object into NOTE_DTYPE records.
+    Ordered by (start, pitch), same as extract_midi_features() in alignaudio.py,
+    so alignment indices from align_midis() point at the right rows.
+    """
+    notes = [(n.start, n.end, n.pitch, n.velocity)
+             for inst in midi.instruments for n in inst.notes]
+    arr = np.array(notes, dtype=NOTE_DTYPE)
+    order = np.lexsort((arr["pitch"], arr["start"]))
+    return arr[order]
+
+
+def alignment_records(alignment: Tuple[Iterable[int], Iterable[int]],
+                      score_notes: np.ndarray, perf_notes: np.ndarray) -> np.ndarray:
+    """Turn the (score_idx, perf_idx) pair list from align_midis() into ALIGN_DTYPE records."""
+    if len(alignment) == 0:
+        return np.zeros(0, dtype=ALIGN_DTYPE)
+    s_idx, p_idx = (np.asarray(a, dtype=np.int64) for a in alignment)
+    out = np.empty(len(s_idx), dtype=ALIGN_DTYPE)
+    out["score_index"] = s_idx
+    out["perf_index"] = p_idx
+    out["score_onset"] = score_notes["start"][s_idx]
+    out["perf_onset"] = perf_notes["start"][p_idx]
+    return out
+
+
+def load_audio(path: str, sample_rate: int = DEFAULT_SAMPLE_RATE) -> np.ndarray:
+    import librosa
+    y, _ = librosa.load(path, sr=sample_rate, mono=True)
+    return y.astype(AUDIO_DTYPE, copy=False)
+
+
+class ShardWriter:
+    """
+    Append pieces to an export directory. Use as a context manager or call
+    close() at the end; the index is only written on close, and not at all if
+    the with block raised, so a crashed export never looks complete.
+
+    With append=True an existing export is reopened and new pieces continue in
+    its last shard. Anything written past the indexed pieces (left by a crashed
+    run) is truncated away first.
+    """
+
+    def __init__(self, out_dir: str, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES, append: bool = False):
+        index_path = os.path.join(out_dir, INDEX_NAME)
+        if os.path.exists(index_path) and not append:
+            raise FileExistsError(f"{out_dir} already holds an exported corpus")
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.sample_rate = sample_rate
+        self.shard_bytes = shard_bytes
+        self.shards: List[Dict[str, str]] = []
+        self.pieces: Dict[str, dict] = {}
+        self._files = {}
+        self._counts = {}
+        self._shard_size = 0
+        if append and os.path.exists(index_path):
+            self._resume(index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._close_files()
+        else:
+            self.close()
+
+    def _resume(self, index_path: str):
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        check_index(index, self.out_dir)
+        if index["sample_rate"] != self.sample_rate:
+            raise ValueError(f"{self.out_dir} is at {index['sample_rate']} Hz, not {self.sample_rate} Hz")
+        self.shards = index["shards"]
+        self.pieces = index["pieces"]
+        if not self.shards:
+            return
+        last = len(self.shards) - 1
+        in_last = [e for e in self.pieces.values() if e["shard"] == last]
+        self._counts = {s: max((e[s][0] + e[s][1] for e in in_last), default=0) for s in STREAMS}
+        self._files = {}
+        for stream, (_, dtype) in STREAMS.items():
+            f = open(os.path.join(self.out_dir, self.shards[last][stream]), "r+b")
+            f.truncate(self._counts[stream] * dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            self._files[stream] = f
+        self._shard_size = sum(self._counts[s] * dt.itemsize for s, (_, dt) in STREAMS.items())
+
+    def _open_shard(self):
+        self._close_files()
+        shard_id = len(self.shards)
+        names = {s: f"shard-{shard_id:05d}.{suffix}" for s, (suffix, _) in STREAMS.items()}
+        self._files = {s: open(os.path.join(self.out_dir, n), "wb") for s, n in names.items()}
+        self._counts = {s: 0 for s in STREAMS}
+        self._shard_size = 0
+        self.shards.append(names)
+
+    def _close_files(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def add(self, piece_id: str, audio: np.ndarray, score_notes: np.ndarray,
+            perf_notes: np.ndarray, alignment: np.ndarray, meta: Optional[dict] = None):
+        """
+        Append one piece from ready-made arrays.
+        audio must already be mono at self.sample_rate; notes must be NOTE_DTYPE
+        sorted by start; alignment must be ALIGN_DTYPE in path order with
+        non-decreasing perf_onset. Raises ValueError otherwise.
+        """
+        if piece_id in self.pieces:
+            raise ValueError(f"Duplicate piece id: {piece_id}")
+        arrays = {
+            "audio": np.ascontiguousarray(audio, dtype=AUDIO_DTYPE),
+            "score_notes": np.ascontiguousarray(score_notes, dtype=NOTE_DTYPE),
+            "perf_notes": np.ascontiguousarray(perf_notes, dtype=NOTE_DTYPE),
+            "alignment": np.ascontiguousarray(alignment, dtype=ALIGN_DTYPE),
+        }
+        # ShardedCorpus slices time ranges with searchsorted, which needs these sorted
+        for stream, field in (("score_notes", "start"), ("perf_notes", "start"),
+                              ("alignment", "perf_onset")):
+            if np.any(np.diff(arrays[stream][field]) < 0):
+                raise ValueError(f"{piece_id}: {stream} must be sorted by {field}")
+        size = sum(a.nbytes for a in arrays.values())
+        if not self.shards or (self._shard_size and self._shard_size + size > self.shard_bytes):
+            self._open_shard()
+
+        entry = {"shard": len(self.shards) - 1,
+                 "duration": len(arrays["audio"]) / self.sample_rate}
+        with profiler.stage("export.write", items=1, nbytes=size):
+            for stream, arr in arrays.items():
+                arr.tofile(self._files[stream])
+                entry[stream] = [self._counts[stream], len(arr)]
+                self._counts[stream] += len(arr)
+        if meta:
+            entry["meta"] = meta
+        self._shard_size += size
+        self.pieces[piece_id] = entry
+
+    def add_piece(self, piece_id: str, audio_path: str, score_midi, perf_midi,
+                  alignment, meta: Optional[dict] = None):
+        """
+        Decode audio_path at the export sample rate and append it together with
+        the two PrettyMIDI objects and the alignment returned by align_midis().
+        """
+        with profiler.stage("export.decode") as st:
+            audio = load_audio(audio_path, self.sample_rate)
+            st.add(items=1, nbytes=audio.nbytes)
+        score_notes = notes_from_midi(score_midi)
+        perf_notes = notes_from_midi(perf_midi)
+        self.add(piece_id, audio, score_notes, perf_notes,
+                 alignment_records(alignment, score_notes, perf_notes), meta)
+
+    def close(self):
+        self._close_files()
+        index = {
+            "version": FORMAT_VERSION,
+            "sample_rate": self.sample_rate,
+            "shard_bytes": self.shard_bytes,
+            "dtypes": {s: dtype_descr(dt) for s, (_, dt) in STREAMS.items()},
+            "shards": self.shards,
+            "pieces": self.pieces,
+        }
+        # Write then rename, so readers never see a half-written index
+        path = os.path.join(self.out_dir, INDEX_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+
+class ShardedCorpus:
+    """
+    Read-only view over an export directory. Every accessor returns a slice of
+    a read-only np.memmap, so nothing is copied until the caller touches it.
+    Time ranges are in performance (audio) seconds, except score_notes() which
+    is in score seconds.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, INDEX_NAME), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        check_index(self.index, root)
+        self.sample_rate = self.index["sample_rate"]
+        self.pieces = self.index["pieces"]
+        self._maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Drop the cached maps; slices already handed out keep their own reference."""
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def __iter__(self):
+        return iter(self.pieces)
+
+    def __contains__(self, piece_id):
+        return piece_id in self.pieces
+
+    def _map(self, shard: int, stream: str) -> np.ndarray:
+        key = (shard, stream)
+        if key not in self._maps:
+            path = os.path.join(self.root, self.index["shards"][shard][stream])
+            dtype = STREAMS[stream][1]
+            # mmap cannot map an empty file
+            if os.path.getsize(path) == 0:
+                self._maps[key] = np.zeros(0, dtype=dtype)
+            else:
+                self._maps[key] = np.memmap(path, dtype=dtype, mode="r")
+        return self._maps[key]
+
+    def _stream(self, piece_id: str, stream: str) -> np.ndarray:
+        entry = self.pieces[piece_id]
+        offset, length = entry[stream]
+        return self._map(entry["shard"], stream)[offset:offset + length]
+
+    @staticmethod
+    def _time_slice(arr: np.ndarray, times: np.ndarray,
+                    start: Optional[float], end: Optional[float]) -> np.ndarray:
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(arr) if end is None else int(np.searchsorted(times, end, side="left"))
+        return arr[lo:hi]
+
+    def duration(self, piece_id: str) -> float:
+        return self.pieces[piece_id]["duration"]
+
+    def audio(self, piece_id: str, start: Optional[float] = None,
+              end: Optional[float] = None) -> np.ndarray:
+        samples = self._stream(piece_id, "audio")
+        lo = 0 if start is None else max(0, int(round(start * self.sample_rate)))
+        hi = len(samples) if end is None else max(lo, int(round(end * self.sample_rate)))
+        return samples[lo:hi]
+
+    def perf_notes(self, piece_id: str, start: Optional[float] = None,
+                   end: Optional[float] = None) -> np.ndarray:
+        """Performance notes whose onset falls in [start, end)."""
+        notes = self._stream(piece_id, "perf_notes")
+        return self._time_slice(notes, notes["start"], start, end)
+
+    def score_notes(self, piece_id: str, start: Optional[float] = None,
+                    end: Optional[float] = None) -> np.ndarray:
+        """Score notes whose onset (score time) falls in [start, end)."""
+        notes = self._stream(piece_id, "score_notes")
+        return self._time_slice(notes, notes["start"], start, end)
+
+    def alignment(self, piece_id: str, start: Optional[float] = None,
+                  end: Optional[float] = None) -> np.ndarray:
+        """
+        Alignment pairs whose performance onset falls in [start, end).
+        The DTW path is monotone, so perf_onset is already non-decreasing.
+        """
+        pairs = self._stream(piece_id, "alignment")
+        return self._time_slice(pairs, pairs["perf_onset"], start, end)
+
+    def window(self, piece_id: str, start: float, end: float) -> dict:
+        """Everything for one performance time range, for use in a data loader."""
+        return {
+            "audio": self.audio(piece_id, start, end),
+            "perf_notes": self.perf_notes(piece_id, start, end),
+            "alignment": self.alignment(piece_id, start, end),
+        }
+
@@ -0,0 +1,245 @@
+"""
+Synthetic offline fixtures for the benchmark suite.
+
+Nothing here touches the network: pages are served from a local HTTP server,
+YouTube and OpenAI clients are in-process fakes shaped like the real responses,
+and MIDI/audio are generated from a seed.
+"""
+
+import time
+import zlib
+import random
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+WORDS = ["piano", "sonata", "nocturne", "etude", "waltz", "prelude", "cover", "live",
+         "tutorial", "lesson", "synthesia", "hands", "performance", "chopin", "liszt",
+         "debussy", "how to", "relaxing", "study", "home", "recital", "guitar"]
+
+
+def random_text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+# Local HTTP stand-in for Wikipedia
+
+def wiki_page(i: int, n_pages: int, links_per_page: int, paragraph_words: int = 80) -> str:
+    rng = random.Random(i)
+    links = "\n".join(
+        f'<li><a href="/wiki/Page_{rng.randrange(n_pages)}">Page {i}</a></li>'
+        for _ in range(links_per_page)
+    )
+    ext = "\n".join(
+        f'<a href="https://imslp.org/wiki/Piece_{i}_{k}">score {k}</a>' for k in range(5)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>Page {i}</title></head>
+<body>
+<h1 id="firstHeading">Page {i}</h1>
+<div id="bodyContent"><div class="mw-parser-output">
+<p class="mw-empty-elt"></p>
+<p>{random_text(rng, paragraph_words)}</p>
+<ul>{links}</ul>
+<a href="/wiki/Talk:Page_{i}">talk</a>
+<a href="#top">top</a>
+{ext}
+</div></div>
+</body></html>"""
+
+
+@contextmanager
+def serve_wiki(n_pages: int = 200, links_per_page: int = 20):
+    """Serve /robots.txt and /wiki/Page_<i> on 127.0.0.1. Yields the base URL."""
+    pages = {f"/wiki/Page_{i}": wiki_page(i, n_pages, links_per_page).encode("utf-8")
+             for i in range(n_pages)}
+    robots = b"User-agent: *\nAllow: /\n"
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = robots if self.path == "/robots.txt" else pages.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            ctype = "text/plain" if self.path == "/robots.txt" else "text/html; charset=utf-8"
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# Fake YouTube Data API client, enough for youtube_query_batch.py
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeYouTube:
+    """
+    build("youtube", "v3", ...) stand-in. Every query has results_per_query
+    videos, paged 50 at a time like search.list.
+    """
+
+    def __init__(self, results_per_query: int = 500, seed: int = 0):
+        self.results_per_query = results_per_query
+        self.seed = seed
+
+    def search(self):
+        return SimpleNamespace(list=self._search_list)
+
+    def videos(self):
+        return SimpleNamespace(list=self._videos_list)
+
+    def _search_list(self, q, maxResults=50, pageToken=None, **kwargs):
+        def run():
+            start = int(pageToken or 0)
+            end = min(start + maxResults, self.results_per_query)
+            base = zlib.crc32(f"{q}|{kwargs.get('publishedAfter')}|{self.seed}".encode()) % 10**6
+            items = [{"kind": "youtube#searchResult",
+                      "id": {"kind": "youtube#video", "videoId": f"v{base}_{k}"}}
+                     for k in range(start, end)]
+            res = {"items": items}
+            if end < self.results_per_query:
+                res["nextPageToken"] = str(end)
+            return res
+        return _Request(run)
+
+    def _videos_list(self, part, id):
+        def run():
+            items = []
+            for vid in id.split(","):
+                rng = random.Random(vid)
+                items.append({
+                    "id": vid,
+                    "snippet": {
+                        "title": random_text(rng, 6),
+                        "description": random_text(rng, 60),
+                        "channelId": f"c{rng.randrange(1000)}",
+                        "channelTitle": random_text(rng, 2),
+                        "publishedAt": "2024-01-01T00:00:00Z",
+                        "tags": [rng.choice(WORDS) for _ in range(5)],
+                        "categoryId": "10",
+                        "thumbnails": {s: {"url": f"https://i.ytimg.com/vi/{vid}/{s}.jpg"}
+                                       for s in ("default", "medium", "high")},
+                    },
+                    "contentDetails": {"duration": f"PT{rng.randrange(1, 10)}M", "dimension": "2d",
+                                       "definition": "hd", "licensedContent": False,
+                                       "projection": "rectangular"},
+                    "statistics": {"viewCount": str(rng.randrange(10**6)),
+                                   "likeCount": str(rng.randrange(10**4)),
+                                   "commentCount": str(rng.randrange(10**3))},
+                })
+            return {"items": items}
+        return _Request(run)
+
+
+# Fake OpenAI client, enough for llm_clean.py
+
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        text = messages[-1]["content"].lower()
+        answer = "NO" if "tutorial" in text or "lesson" in text else "YES"
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=1,
+                                  total_tokens=prompt_tokens + 1),
+        )
+
+
+# Query result CSVs
+
+def write_results_csv(path: str, n_rows: int, seed: int = 0):
+    import pandas as pd
+    rng = random.Random(seed)
+    rows = [{
+        "query": "piano",
+        "videoId": f"v{i}",
+        "title": random_text(rng, 6),
+        "description": random_text(rng, 60),
+        "watch_url": f"https://www.youtube.com/watch?v=v{i}",
+        "thumbnail_default_url": f"https://i.ytimg.com/vi/v{i}/default.jpg",
+    } for i in range(n_rows)]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def write_queries(path: str, n_queries: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# synthetic queries\n")
+        for i in range(n_queries):
+            f.write(f"{random_text(rng, 3)} {i}\n")
+
+
+# Generated MIDI and audio
+
+def make_score_midi(n_notes: int, seed: int = 0):
+    import numpy as np
+    import pretty_midi
+    rng = np.random.default_rng(seed)
+    midi = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(program=0)
+    t = 0.0
+    for _ in range(n_notes):
+        dur = float(rng.choice([0.25, 0.5, 1.0]))
+        inst.notes.append(pretty_midi.Note(velocity=int(rng.integers(40, 100)),
+                                           pitch=int(rng.integers(36, 96)), start=t, end=t + dur))
+        t += float(rng.choice([0.0, 0.25, 0.5]))
+    midi.instruments.append(inst)
+    return midi
+
+
+def make_performance_midi(score, seed: int = 1, tempo: float = 1.1, jitter: float = 0.02,
+                          drop: float = 0.05):
+    """Score played at a different tempo with timing noise and some missed notes."""
+    import numpy as np
+    import pretty_midi
+    rng = np.random.default_rng(seed)
+    midi = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(program=0)
+    for note in score.instruments[0].notes:
+        if rng.random() < drop:
+            continue
+        start = max(0.0, note.start * tempo + float(rng.normal(0, jitter)))
+        inst.notes.append(pretty_midi.Note(velocity=note.velocity, pitch=note.pitch,
+                                           start=start, end=start + (note.end - note.start) * tempo))
+    midi.instruments.append(inst)
+    return midi
+
+
+def make_audio(seconds: float, sample_rate: int = 16000, seed: int = 0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    freqs = rng.uniform(110, 880, size=4)
+    y = sum(np.sin(2 * np.pi * f * t) for f in freqs) / len(freqs)
+    return (0.5 * y + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def write_audio(path: str, seconds: float, sample_rate: int = 44100, seed: int = 0):
+    import soundfile as sf
+    sf.write(path, make_audio(seconds, sample_rate, seed), sample_rate)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmarks for the pipeline hot paths.
+
+Every benchmark runs against the synthetic fixtures in fixtures.py, so no
+network, API key or model download is needed. Each one reports wall time over
+--repeat runs plus the per-stage timings, throughput, API/quota counters and
+peak memory collected by instrument.profiler during the timed runs.
+
+Not covered: yt_dlp downloads and MT3 transcription, which need the network
+and a model checkpoint respectively; the instrumentation in those scripts
+still records them during real runs.
+
+Each benchmark runs in its own subprocess, so its memory figures don't carry
+whatever earlier benchmarks left behind. Benchmarks whose dependencies are
+missing are reported as skipped.
+
+Usage
+  python benchmarks/run_benchmarks.py --output bench.json
+  python benchmarks/run_benchmarks.py --only clean_csv align_midis --scale 4
+  python benchmarks/run_benchmarks.py --baseline bench.json   # exits 1 on regressions
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import tempfile
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for p in (ROOT, os.path.join(ROOT, "queryingmetadata"), os.path.join(ROOT, "webcrawler"), HERE):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from instrument import profiler
+import fixtures
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The function gets (tmpdir, scale), does its setup and
+    returns a zero-argument callable; only that callable is timed.
+    """
+    def wrap(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return wrap
+
+
+@benchmark("crawl")
+def bench_crawl(tmpdir, scale):
+    from crawler import CrawlConfig, crawl
+    n_pages = 50 * scale
+    server = fixtures.serve_wiki(n_pages=n_pages)
+    base = server.__enter__()
+    host = base.split("//", 1)[1]
+    cfg = CrawlConfig(
+        start_urls=[f"{base}/wiki/Page_0"],
+        allowed_domains=[host],
+        # the fixture pages are Wikipedia-shaped, so run them through the real parser
+        parse_domains=[host],
+        max_pages=n_pages,
+        delay_range=(0.0, 0.0),
+        timeout=5,
+    )
+
+    def run():
+        return crawl(cfg)
+    run.cleanup = lambda: server.__exit__(None, None, None)
+    return run
+
+
+@benchmark("parse_wikipedia_page")
+def bench_parse_wikipedia_page(tmpdir, scale):
+    from crawler import parse_wikipedia_page, extract_links
+    n_pages = 100 * scale
+    pages = [(f"https://en.wikipedia.org/wiki/Page_{i}", fixtures.wiki_page(i, n_pages, 50))
+             for i in range(n_pages)]
+
+    def run():
+        with profiler.stage("parse_wikipedia_page", items=len(pages),
+                            nbytes=sum(len(h) for _, h in pages)):
+            for url, html in pages:
+                parse_wikipedia_page(url, html)
+                extract_links(url, html)
+    return run
+
+
+@benchmark("clean_csv")
+def bench_clean_csv(tmpdir, scale):
+    from first_clean import clean_csv
+    src = os.path.join(tmpdir, "results.csv")
+    dst = os.path.join(tmpdir, "results_cleaned.csv")
+    fixtures.write_results_csv(src, 5000 * scale)
+
+    def run():
+        clean_csv(src, dst)
+    return run
+
+
+@benchmark("sift_videos")
+def bench_sift_videos(tmpdir, scale):
+    # llm_clean builds its client at import time and OpenAI() refuses to start without a key
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    import llm_clean
+    llm_clean.client = fixtures.FakeOpenAI()
+    src = os.path.join(tmpdir, "results_cleaned.csv")
+    dst = os.path.join(tmpdir, "final.csv")
+    fixtures.write_results_csv(src, 1000 * scale)
+
+    def run():
+        llm_clean.sift_videos(src, dst)
+    return run
+
+
+@benchmark("youtube_query_batch")
+def bench_youtube_query_batch(tmpdir, scale):
+    import youtube_query_batch
+    queries = os.path.join(tmpdir, "queries.txt")
+    fixtures.write_queries(queries, 10 * scale)
+    argv = ["youtube_query_batch.py", "--queries", queries,
+            "--output-csv", os.path.join(tmpdir, "results.csv"),
+            "--counts-csv", os.path.join(tmpdir, "counts.csv"),
+            "--api-key", "offline-benchmark",
+            "--max-total", str(1000 * scale), "--max-search-calls", str(40 * scale),
+            "--profile-json", os.path.join(tmpdir, "profile.json")]
+    fake = fixtures.FakeYouTube(results_per_query=200)
+
+    def run():
+        with mock.patch.object(youtube_query_batch, "build", return_value=fake), \
+             mock.patch.object(sys, "argv", argv):
+            youtube_query_batch.main()
+    return run
+
+
+@benchmark("align_midis")
+def bench_align_midis(tmpdir, scale):
+    from alignaudio import align_midis, save_alignment
+    score = fixtures.make_score_midi(500 * scale)
+    perf = fixtures.make_performance_midi(score)
+    out = os.path.join(tmpdir, "alignment.csv")
+
+    def run():
+        result = align_midis(score, perf)
+        save_alignment(*result, out)
+    return run
+
+
+@benchmark("corpus_export")
+def bench_corpus_export(tmpdir, scale):
+    from alignedcorpus import ShardWriter, notes_from_midi, alignment_records
+    sr = 16000
+    pieces = []
+    for i in range(4 * scale):
+        score = fixtures.make_score_midi(300, seed=i)
+        perf = fixtures.make_performance_midi(score, seed=i + 1)
+        s_notes, p_notes = notes_from_midi(score), notes_from_midi(perf)
+        n = min(len(s_notes), len(p_notes))
+        alignment = (list(range(n)), list(range(n)))
+        audio = fixtures.make_audio(p_notes["end"].max() if len(p_notes) else 1.0, sr, seed=i)
+        pieces.append((f"piece_{i}", audio, s_notes, p_notes,
+                       alignment_records(alignment, s_notes, p_notes)))
+    runs = itertools.count()
+
+    def run():
+        out_dir = os.path.join(tmpdir, f"corpus_{next(runs)}")
+        with ShardWriter(out_dir, sample_rate=sr, shard_bytes=8 * 1024 * 1024) as writer:
+            for piece in pieces:
+                writer.add(*piece)
+    return run
+
+
+@benchmark("corpus_decode")
+def bench_corpus_decode(tmpdir, scale):
+    from alignedcorpus import ShardWriter
+    pieces = []
+    for i in range(2 * scale):
+        score = fixtures.make_score_midi(200, seed=i)
+        perf = fixtures.make_performance_midi(score, seed=i + 1)
+        n = min(len(score.instruments[0].notes), len(perf.instruments[0].notes))
+        path = os.path.join(tmpdir, f"piece_{i}.wav")
+        # 44.1 kHz on disk so add_piece has to resample to the export rate
+        fixtures.write_audio(path, perf.get_end_time(), sample_rate=44100, seed=i)
+        pieces.append((f"piece_{i}", path, score, perf, (list(range(n)), list(range(n)))))
+    runs = itertools.count()
+
+    def run():
+        out_dir = os.path.join(tmpdir, f"corpus_{next(runs)}")
+        with ShardWriter(out_dir, sample_rate=16000) as writer:
+            for piece in pieces:
+                writer.add_piece(*piece)
+    return run
+
+
+@benchmark("corpus_read")
+def bench_corpus_read(tmpdir, scale):
+    from alignedcorpus import ShardedCorpus
+    export = bench_corpus_export(tmpdir, scale)
+    export()
+    corpus = ShardedCorpus(os.path.join(tmpdir, "corpus_0"))
+    n_windows = 2000 * scale
+    ids = list(corpus)
+
+    def run():
+        rng = random.Random(0)
+        with profiler.stage("corpus_read.window") as st:
+            for _ in range(n_windows):
+                pid = rng.choice(ids)
+                start = rng.uniform(0, max(0.0, corpus.duration(pid) - 2.0))
+                win = corpus.window(pid, start, start + 2.0)
+                # Slices are lazy; sum() touches the pages so the read is actually timed
+                win["audio"].sum()
+                st.add(items=1, nbytes=win["audio"].nbytes)
+    return run
+
+
+def run_benchmark(name, scale, repeat, warmup):
+    # The scripts print progress; keep stdout clean for the JSON document
+    with tempfile.TemporaryDirectory(prefix=f"waves-bench-{name}-") as tmpdir, \
+         redirect_stdout(sys.stderr):
+        try:
+            run = BENCHMARKS[name](tmpdir, scale)
+        except ImportError as e:
+            return {"status": "skipped", "reason": f"missing dependency: {e.name or e}"}
+        try:
+            for _ in range(warmup):
+                run()
+            profiler.reset()
+            rss_at_start = profiler.peak_rss
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - t0)
+            report = profiler.report()
+        finally:
+            cleanup = getattr(run, "cleanup", None)
+            if cleanup:
+                cleanup()
+    return {
+        "status": "ok",
+        "repeat": repeat,
+        "best_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "mean_s": round(statistics.mean(times), 6),
+        "times_s": [round(t, 6) for t in times],
+        "peak_rss_bytes": report["peak_rss_bytes"],
+        # growth over the process after setup and warmup, i.e. what the timed runs added
+        "peak_rss_delta_bytes": (report["peak_rss_bytes"] - rss_at_start
+                                 if report["peak_rss_bytes"] is not None and rss_at_start is not None
+                                 else None),
+        "stages": report["stages"],
+        "api": report["api"],
+    }
+
+
+def run_isolated(name, scale, repeat, warmup):
+    """Run one benchmark in a fresh interpreter and return its result dict."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", name, "--scale", str(scale),
+           "--repeat", str(repeat), "--warmup", str(warmup)]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        return {"status": "error", "reason": f"worker exited with {proc.returncode}"}
+    return json.loads(proc.stdout)
+
+
+def compare(results, baseline, tolerance, mem_tolerance):
+    """
+    Names of benchmarks whose median time or peak RSS grew past baseline by more
+    than tolerance / mem_tolerance. Ratios are stored on each result.
+    """
+    regressions = []
+    for name, res in results.items():
+        old = baseline.get("benchmarks", {}).get(name, {})
+        if res.get("status") != "ok" or old.get("status") != "ok":
+            continue
+        regressed = False
+        if old.get("median_s"):
+            res["baseline_median_s"] = old["median_s"]
+            res["ratio"] = round(res["median_s"] / old["median_s"], 3)
+            regressed |= res["ratio"] > 1 + tolerance
+        if old.get("peak_rss_bytes") and res.get("peak_rss_bytes"):
+            res["baseline_peak_rss_bytes"] = old["peak_rss_bytes"]
+            res["mem_ratio"] = round(res["peak_rss_bytes"] / old["peak_rss_bytes"], 3)
+            regressed |= res["mem_ratio"] > 1 + mem_tolerance
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=None)
+    ap.add_argument("--scale", type=int, default=1, help="multiplies fixture sizes")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--output", default=None, help="write results JSON here (default stdout)")
+    ap.add_argument("--baseline", default=None, help="earlier --output file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2,
+                    help="allowed median slowdown vs baseline before flagging (0.2 = 20%%)")
+    ap.add_argument("--mem-tolerance", type=float, default=0.2,
+                    help="allowed peak RSS growth vs baseline before flagging")
+    # internal: run a single benchmark in this process and print its result as JSON
+    ap.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        res = run_benchmark(args.worker, args.scale, args.repeat, args.warmup)
+        profiler.stop_sampling()
+        print(json.dumps(res))
+        return
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"[bench] {name} ...", file=sys.stderr)
+        results[name] = res = run_isolated(name, args.scale, args.repeat, args.warmup)
+        if res["status"] == "ok":
+            rss = res["peak_rss_bytes"]
+            mem = f"  peak rss {rss / 2**20:.1f} MiB" if rss else ""
+            print(f"[bench] {name}  median {res['median_s']:.4f}s  best {res['best_s']:.4f}s{mem}",
+                  file=sys.stderr)
+        else:
+            print(f"[bench] {name}  {res['status']} ({res['reason']})", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.mem_tolerance)
+        for name in regressions:
+            res = results[name]
+            print(f"[bench] REGRESSION {name}  time x{res.get('ratio')}  memory x{res.get('mem_ratio')} "
+                  f"vs baseline", file=sys.stderr)
+
+    doc = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "scale": args.scale,
+        "benchmarks": results,
+        "regressions": regressions,
+    }
+    text = json.dumps(doc, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote benchmark results to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Shared per-stage instrumentation for the pipeline scripts.
+
+Records, per named stage
+  wall and cpu time (calls, total, min, max)
+  item and byte counters, with throughput over the stage's wall time
+  peak RSS seen while the stage was running (sampled by a background thread;
+  Linux via /proc, macOS via task_info, None elsewhere)
+plus API call and quota counters, and dumps all of it as one JSON document.
+
+Usage
+  from instrument import profiler
+
+  with profiler.stage("clean_csv") as st:
+      ...
+      st.add(items=len(df))
+  profiler.api_call("youtube.search.list", quota=100)
+  profiler.emit("profile.json")   # or set WAVES_PROFILE=profile.json
+
+Stdlib only, so every script can import it regardless of which extras are installed.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+PROFILE_ENV = "WAVES_PROFILE"
+
+
+_darwin_task_info = None
+
+
+def _darwin_rss() -> Optional[int]:
+    """Current RSS on macOS from mach task_info(MACH_TASK_BASIC_INFO)."""
+    global _darwin_task_info
+    import ctypes
+    if _darwin_task_info is None:
+        class TimeValue(ctypes.Structure):
+            _fields_ = [("seconds", ctypes.c_int), ("microseconds", ctypes.c_int)]
+
+        class MachTaskBasicInfo(ctypes.Structure):
+            _pack_ = 4  # declared under #pragma pack(4) in <mach/task_info.h>
+            _fields_ = [("virtual_size", ctypes.c_uint64),
+                        ("resident_size", ctypes.c_uint64),
+                        ("resident_size_max", ctypes.c_uint64),
+                        ("user_time", TimeValue),
+                        ("system_time", TimeValue),
+                        ("policy", ctypes.c_int),
+                        ("suspend_count", ctypes.c_int)]
+
+        libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib")
+        libc.task_info.argtypes = [ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+                                   ctypes.POINTER(ctypes.c_uint)]
+        libc.task_info.restype = ctypes.c_int
+        task = ctypes.c_uint.in_dll(libc, "mach_task_self_").value
+        _darwin_task_info = (libc.task_info, task, MachTaskBasicInfo)
+
+    task_info, task, info_type = _darwin_task_info
+    info = info_type()
+    count = ctypes.c_uint(ctypes.sizeof(info) // 4)
+    MACH_TASK_BASIC_INFO = 20
+    if task_info(task, MACH_TASK_BASIC_INFO, ctypes.byref(info), ctypes.byref(count)) != 0:
+        return None
+    return info.resident_size
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of this process in bytes, or None where it cannot be read.
+    Never falls back to ru_maxrss: that is the lifetime high-water mark and would
+    make every stage after the largest one report the same peak.
+    """
+    if sys.platform == "darwin":
+        try:
+            return _darwin_rss()
+        except (OSError, AttributeError, ValueError):
+            return None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss() -> Optional[int]:
+    """Process-lifetime peak RSS in bytes as reported by the OS."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.min_s = None
+        self.max_s = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.peak_rss = None
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "min_s": round(self.min_s, 6) if self.min_s is not None else None,
+            "max_s": round(self.max_s, 6),
+            "mean_s": round(self.wall_s / self.calls, 6) if self.calls else None,
+            "items": self.items,
+            "bytes": self.bytes,
+            "items_per_s": round(self.items / self.wall_s, 3) if self.wall_s and self.items else None,
+            "bytes_per_s": round(self.bytes / self.wall_s, 3) if self.wall_s and self.bytes else None,
+            "peak_rss_bytes": self.peak_rss,
+            "errors": self.errors,
+        }
+
+
+class StageTimer:
+    """Handle yielded by Profiler.stage() to add counters from inside the block."""
+
+    def __init__(self):
+        self.items = 0
+        self.bytes = 0
+        self.peak_rss = None
+
+    def add(self, items: int = 0, nbytes: int = 0):
+        self.items += items
+        self.bytes += nbytes
+
+
+class Profiler:
+    def __init__(self, sample_interval: float = 0.05):
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages: Dict[str, StageStats] = {}
+            self.api: Dict[str, Dict[str, int]] = {}
+            self.peak_rss = current_rss()
+            self._active = set()
+            self._started = time.perf_counter()
+            self._started_at = datetime.now(timezone.utc)
+
+    # Memory sampling
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is None:
+            return
+        with self._lock:
+            if self.peak_rss is None or rss > self.peak_rss:
+                self.peak_rss = rss
+            for timer in self._active:
+                if timer.peak_rss is None or rss > timer.peak_rss:
+                    timer.peak_rss = rss
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def start_sampling(self):
+        if self._sampler is not None and self._sampler.is_alive():
+            return
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="instrument-rss", daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    # Stages and counters
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0, nbytes: int = 0):
+        """Time a block under name. Counters may be passed up front or via the yielded timer."""
+        self.start_sampling()
+        timer = StageTimer()
+        timer.add(items, nbytes)
+        with self._lock:
+            self._active.add(timer)
+        self._sample()
+        failed = False
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield timer
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            self._sample()
+            with self._lock:
+                self._active.discard(timer)
+                st = self.stages.setdefault(name, StageStats())
+                st.calls += 1
+                st.wall_s += wall
+                st.cpu_s += cpu
+                st.min_s = wall if st.min_s is None else min(st.min_s, wall)
+                st.max_s = max(st.max_s, wall)
+                st.items += timer.items
+                st.bytes += timer.bytes
+                st.errors += failed
+                if timer.peak_rss is not None and (st.peak_rss is None or timer.peak_rss > st.peak_rss):
+                    st.peak_rss = timer.peak_rss
+
+    def timed(self, name: Optional[str] = None):
+        """Decorator form of stage(); defaults to the function's name."""
+        def wrap(fn):
+            stage_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                with self.stage(stage_name):
+                    return fn(*args, **kwargs)
+            return inner
+        return wrap
+
+    def count(self, name: str, items: int = 0, nbytes: int = 0):
+        """Add to a stage's counters without timing anything."""
+        with self._lock:
+            st = self.stages.setdefault(name, StageStats())
+            st.items += items
+            st.bytes += nbytes
+
+    def api_call(self, name: str, quota: int = 0, calls: int = 1, **extra: int):
+        """
+        Count calls against an external API. quota is in the API's own units
+        (YouTube Data API units, tokens, ...); extra keyword counters are summed too.
+        """
+        with self._lock:
+            rec = self.api.setdefault(name, {"calls": 0, "quota": 0})
+            rec["calls"] += calls
+            rec["quota"] += quota
+            for k, v in extra.items():
+                rec[k] = rec.get(k, 0) + v
+
+    # Output
+
+    def report(self) -> dict:
+        self._sample()
+        with self._lock:
+            return {
+                "started_at": self._started_at.isoformat(),
+                "elapsed_s": round(time.perf_counter() - self._started, 6),
+                "pid": os.getpid(),
+                "argv": sys.argv,
+                "peak_rss_bytes": self.peak_rss,
+                "max_rss_bytes": max_rss(),
+                "stages": {k: v.as_dict() for k, v in self.stages.items()},
+                "api": {k: dict(v) for k, v in self.api.items()},
+            }
+
+    def emit(self, path: Optional[str] = None) -> dict:
+        """
+        Write report() as JSON to path, or to $WAVES_PROFILE if path is None.
+        "-" writes to stderr. With neither set, nothing is written.
+        """
+        rep = self.report()
+        path = path or os.getenv(PROFILE_ENV)
+        if not path:
+            return rep
+        text = json.dumps(rep, indent=2)
+        if path == "-":
+            print(text, file=sys.stderr)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"Wrote profile to {path}")
+        return rep
+
+
+# Shared instance used by the pipeline scripts
+profiler = Profiler()
@@ -2,6 +2,20 @@ import os
 import pandas as pd
 import yt_dlp
 
+try:
+    from instrument import profiler
+except ImportError:  # repo root not on PYTHONPATH: run without profiling
+    from contextlib import nullcontext
+
+    class _NoProfiler:
+        api = {}
+        def stage(self, *args, **kwargs): return nullcontext(self)
+        def timed(self, name=None): return lambda fn: fn
+        def add(self, *args, **kwargs): pass
+        count = api_call = emit = add
+
+    profiler = _NoProfiler()
+
 def download_mp3(url: str, title: str, out_dir: str = "downloads"):
     os.makedirs(out_dir, exist_ok=True)
     
@@ -21,9 +35,11 @@ def download_mp3(url: str, title: str, out_dir: str = "downloads"):
         "quiet": False,
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with profiler.stage("download") as st, yt_dlp.YoutubeDL(ydl_opts) as ydl:
         print(f"Downloading: {title}")
         ydl.download([url])
+        mp3_path = os.path.join(out_dir, f"{safe_title}.mp3")
+        st.add(items=1, nbytes=os.path.getsize(mp3_path) if os.path.exists(mp3_path) else 0)
 
 
 def download_from_csv(csv_file: str, out_dir: str = "downloads"):
@@ -35,8 +51,10 @@ def download_from_csv(csv_file: str, out_dir: str = "downloads"):
             try:
                 download_mp3(url, title, out_dir)
             except Exception as e:
+                profiler.count("download.failed", items=1)
                 print(f"Failed to download {title} ({url}): {e}")
 
 
 if __name__ == "__main__":
     download_from_csv("final.csv")
+    profiler.emit()
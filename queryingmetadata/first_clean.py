@@ -1,5 +1,20 @@
+import os
 import pandas as pd
 
+try:
+    from instrument import profiler
+except ImportError:  # repo root not on PYTHONPATH: run without profiling
+    from contextlib import nullcontext
+
+    class _NoProfiler:
+        api = {}
+        def stage(self, *args, **kwargs): return nullcontext(self)
+        def timed(self, name=None): return lambda fn: fn
+        def add(self, *args, **kwargs): pass
+        count = api_call = emit = add
+
+    profiler = _NoProfiler()
+
 BAD_WORDS = ["tutorial", "lesson", "synthesia", "guitar", "playlist", 
              "sight reading", "sight read", "how to", "learn", "explain"]
 REQUIRED_WORDS = ["piano"]
@@ -18,8 +33,10 @@ def contains_required_word(text: str) -> bool:
     lower = text.lower()
     return any(req in lower for req in REQUIRED_WORDS)
 
+@profiler.timed("clean_csv")
 def clean_csv(input_csv: str, output_csv: str):
     df = pd.read_csv(input_csv)
+    profiler.count("clean_csv", items=len(df), nbytes=os.path.getsize(input_csv))
 
     bad_mask = df["title"].apply(contains_bad_word) | df["description"].apply(contains_bad_word)
     required_mask = df["title"].apply(contains_required_word) | df["description"].apply(contains_required_word)
@@ -33,3 +50,4 @@ def clean_csv(input_csv: str, output_csv: str):
 
 if __name__ == "__main__":
     clean_csv("results.csv", "results_cleaned_python.csv")
+    profiler.emit()
@@ -2,6 +2,20 @@ import os
 import pandas as pd
 from openai import OpenAI
 
+try:
+    from instrument import profiler
+except ImportError:  # repo root not on PYTHONPATH: run without profiling
+    from contextlib import nullcontext
+
+    class _NoProfiler:
+        api = {}
+        def stage(self, *args, **kwargs): return nullcontext(self)
+        def timed(self, name=None): return lambda fn: fn
+        def add(self, *args, **kwargs): pass
+        count = api_call = emit = add
+
+    profiler = _NoProfiler()
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 #this prompt sucks, havent run yet. need a clearer idea of what llm purpose is because think everything can be done through first filtering?
@@ -25,12 +39,21 @@ def is_relevant(title: str, description: str, thumbnail: str = None) -> bool:
         ],
         max_tokens=5
     )
+    usage = getattr(response, "usage", None)
+    profiler.api_call(
+        "openai.chat.completions",
+        quota=getattr(usage, "total_tokens", 0) or 0,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+    )
 
     answer = response.choices[0].message.content.strip().lower()
     return answer.startswith("yes")
 
+@profiler.timed("sift_videos")
 def sift_videos(input_csv: str, output_csv: str):
     df = pd.read_csv(input_csv)
+    profiler.count("sift_videos", items=len(df))
 
     results = []
     for _, row in df.iterrows():
@@ -50,3 +73,4 @@ def sift_videos(input_csv: str, output_csv: str):
 
 if __name__ == "__main__":
     sift_videos("results_cleaned_python.csv", "final.csv")
+    profiler.emit()
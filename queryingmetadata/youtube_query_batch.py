@@ -10,6 +10,7 @@ Caps added
 
 Install
   pip install google-api-python-client python-dateutil pandas
+  put the repo root on PYTHONPATH to enable profiling (see README)
 """
 
 import os, sys, time, argparse, json
@@ -19,6 +20,20 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import pandas as pd
 
+try:
+    from instrument import profiler
+except ImportError:  # repo root not on PYTHONPATH: run without profiling
+    from contextlib import nullcontext
+
+    class _NoProfiler:
+        api = {}
+        def stage(self, *args, **kwargs): return nullcontext(self)
+        def timed(self, name=None): return lambda fn: fn
+        def add(self, *args, **kwargs): pass
+        count = api_call = emit = add
+
+    profiler = _NoProfiler()
+
 ISO_FMT = "%Y-%m-%d"
 
 def iso8601(dt): return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -32,8 +47,14 @@ def month_ranges(start_dt, end_dt):
         yield iso8601(cur), iso8601(nxt)
         cur = nxt
 
-def safe_execute(request, max_retries=5):
+def safe_execute(request, max_retries=5, api_name=None, quota=0):
+    """
+    Execute with retries. If api_name is given every attempt is counted,
+    since the API charges quota for failed calls as well.
+    """
     for attempt in range(max_retries):
+        if api_name:
+            profiler.api_call(api_name, quota=quota, retries=int(attempt > 0))
         try:
             return request.execute()
         except HttpError as e:
@@ -44,6 +65,8 @@ def safe_execute(request, max_retries=5):
             raise
         except Exception:
             time.sleep(1.5 * (attempt + 1))
+    if api_name:
+        profiler.api_call(api_name, quota=quota, retries=1)
     return request.execute()
 
 def collect_search_ids(youtube, query, order, published_after, published_before,
@@ -67,7 +90,7 @@ def collect_search_ids(youtube, query, order, published_after, published_before,
             **({"publishedAfter": published_after} if published_after else {}),
             **({"publishedBefore": published_before} if published_before else {})
         )
-        res = safe_execute(req)
+        res = safe_execute(req, api_name="youtube.search.list", quota=100)
         calls_used += 1
         items = res.get("items", [])
         for it in items:
@@ -86,7 +109,7 @@ def enrich_video_meta(youtube, video_ids):
             part="snippet,contentDetails,statistics",
             id=",".join(chunk)
         )
-        res = safe_execute(req)
+        res = safe_execute(req, api_name="youtube.videos.list", quota=1)
         for it in res.get("items", []):
             sn = it.get("snippet", {})
             cd = it.get("contentDetails", {})
@@ -164,6 +187,8 @@ def main():
                     help="hard limit on number of search.list calls per run")
     ap.add_argument("--checkpoint-every", type=int, default=500,
                     help="write partial CSV every N enriched videos")
+    ap.add_argument("--profile-json", default=None,
+                    help="write per-stage timings and API counters as JSON (default $WAVES_PROFILE)")
     args = ap.parse_args()
 
     if not args.api_key:
@@ -211,15 +236,17 @@ def main():
                 if args.max_search_calls is not None:
                     budget_left = max(0, args.max_search_calls - search_calls_used)
 
-                ids, used = collect_search_ids(
-                    youtube=yt,
-                    query=q,
-                    order=args.order,
-                    published_after=ws,
-                    published_before=we,
-                    per_query_cap=args.per_query_cap,
-                    search_call_budget=budget_left
-                )
+                with profiler.stage("youtube.search") as st:
+                    ids, used = collect_search_ids(
+                        youtube=yt,
+                        query=q,
+                        order=args.order,
+                        published_after=ws,
+                        published_before=we,
+                        per_query_cap=args.per_query_cap,
+                        search_call_budget=budget_left
+                    )
+                    st.add(items=len(ids))
                 search_calls_used += used
                 if not ids:
                     counts_rows.append({"query": q, "window_start": ws, "window_end": we, "raw_count": 0})
@@ -245,7 +272,9 @@ def main():
                     continue
 
                 # Enrich and record
-                enriched = enrich_video_meta(yt, new_ids)
+                with profiler.stage("youtube.enrich") as st:
+                    enriched = enrich_video_meta(yt, new_ids)
+                    st.add(items=len(enriched))
                 total_enriched += len(enriched)
                 query_added += len(enriched)
 
@@ -264,7 +293,8 @@ def main():
                 # Periodic checkpoint
                 if total_enriched % max(args.checkpoint_every, 1) == 0:
                     print("    checkpoint: writing partial CSVs...")
-                    write_checkpoint(rows, counts_rows, args.output_csv, args.counts_csv)
+                    with profiler.stage("checkpoint", items=len(rows)):
+                        write_checkpoint(rows, counts_rows, args.output_csv, args.counts_csv)
 
                 if total_enriched >= args.max_total:
                     print("Global max-total reached; stopping.")
@@ -282,10 +312,15 @@ def main():
 
     finally:
         # Final write
-        write_checkpoint(rows, counts_rows, args.output_csv, args.counts_csv)
+        with profiler.stage("checkpoint", items=len(rows)):
+            write_checkpoint(rows, counts_rows, args.output_csv, args.counts_csv)
         print(f"Wrote {len(rows)} rows to {args.output_csv}")
         print(f"Wrote counts to {args.counts_csv}")
         print(f"search.list calls used: {search_calls_used}  approx quota: {search_calls_used * 100} units")
+        if profiler.api:
+            quota_used = sum(v["quota"] for k, v in profiler.api.items() if k.startswith("youtube."))
+            print(f"quota used incl. videos.list and retries: {quota_used} units")
+        profiler.emit(args.profile_json)
 
 if __name__ == "__main__":
     main()
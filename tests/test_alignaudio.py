@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pretty_midi = pytest.importorskip("pretty_midi")
+pytest.importorskip("fastdtw")
+pytest.importorskip("scipy")
+
+from alignaudio import align_midis, save_alignment
+
+
+def make_midi(onsets, pitches):
+    midi = pretty_midi.PrettyMIDI()
+    inst = pretty_midi.Instrument(program=0)
+    for t, p in zip(onsets, pitches):
+        inst.notes.append(pretty_midi.Note(velocity=80, pitch=int(p), start=float(t), end=float(t) + 0.4))
+    midi.instruments.append(inst)
+    return midi
+
+
+def test_save_alignment_writes_one_row_per_path_step(tmp_path):
+    rng = np.random.default_rng(0)
+    pitches = rng.integers(48, 84, size=40)
+    score = make_midi(np.arange(40) * 0.5, pitches)
+    perf = make_midi(np.arange(40) * 0.55 + rng.normal(0, 0.02, size=40).clip(0), pitches)
+
+    alignment, *features = align_midis(score, perf)
+    out = tmp_path / "alignment.csv"
+    save_alignment(alignment, *features, str(out))
+
+    lines = out.read_text().splitlines()
+    assert lines[0] == "Score_Onset,Score_Pitch,Performance_Onset,Performance_Pitch"
+    assert len(lines) - 1 == len(alignment[0]) == len(alignment[1])
+    assert len(alignment[0]) >= 40
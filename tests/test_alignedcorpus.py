@@ -0,0 +1,134 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from alignedcorpus import (ALIGN_DTYPE, INDEX_NAME, NOTE_DTYPE, ShardWriter, ShardedCorpus,
+                           alignment_records)
+
+SR = 100
+
+
+def make_notes(n, step=0.5):
+    notes = np.zeros(n, dtype=NOTE_DTYPE)
+    notes["start"] = np.arange(n) * step
+    notes["end"] = notes["start"] + step
+    notes["pitch"] = 60 + np.arange(n) % 12
+    notes["velocity"] = 80
+    return notes
+
+
+def make_piece(seconds, n_notes, seed=0):
+    audio = np.random.default_rng(seed).standard_normal(seconds * SR).astype(np.float32)
+    score, perf = make_notes(n_notes, 0.5), make_notes(n_notes, 0.6)
+    idx = list(range(n_notes))
+    return audio, score, perf, alignment_records((idx, idx), score, perf)
+
+
+def test_round_trip_slices(tmp_path):
+    audio, score, perf, align = make_piece(10, 12)
+    with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+        writer.add("a", audio, score, perf, align)
+
+    corpus = ShardedCorpus(str(tmp_path))
+    assert list(corpus) == ["a"]
+    assert corpus.duration("a") == 10
+    assert np.array_equal(corpus.audio("a"), audio)
+    assert np.array_equal(corpus.audio("a", 1.0, 2.5), audio[100:250])
+    assert np.array_equal(corpus.score_notes("a"), score)
+
+    notes = corpus.perf_notes("a", 1.0, 3.0)
+    assert np.array_equal(notes, perf[(perf["start"] >= 1.0) & (perf["start"] < 3.0)])
+    pairs = corpus.alignment("a", 1.0, 3.0)
+    assert np.array_equal(pairs, align[(align["perf_onset"] >= 1.0) & (align["perf_onset"] < 3.0)])
+
+    win = corpus.window("a", 1.0, 3.0)
+    assert np.array_equal(win["audio"], audio[100:300])
+    assert np.array_equal(win["perf_notes"], notes)
+    assert np.array_equal(win["alignment"], pairs)
+    for arr in win.values():
+        assert isinstance(arr, np.memmap)
+
+
+def test_shard_rollover_and_empty_alignment(tmp_path):
+    pieces = {f"p{i}": make_piece(4, 5, seed=i) for i in range(3)}
+    audio, score, perf, _ = make_piece(2, 3, seed=9)
+    # Each piece is ~2 KB, so every one should land in its own shard
+    with ShardWriter(str(tmp_path), sample_rate=SR, shard_bytes=2048) as writer:
+        for pid, piece in pieces.items():
+            writer.add(pid, *piece)
+        writer.add("empty", audio, score, perf, np.zeros(0, dtype=ALIGN_DTYPE))
+
+    corpus = ShardedCorpus(str(tmp_path))
+    assert [corpus.pieces[p]["shard"] for p in corpus] == [0, 1, 2, 3]
+    for pid, (audio_i, _, perf_i, align_i) in pieces.items():
+        assert np.array_equal(corpus.audio(pid), audio_i)
+        assert np.array_equal(corpus.perf_notes(pid), perf_i)
+        assert np.array_equal(corpus.alignment(pid), align_i)
+    assert len(corpus.alignment("empty")) == 0
+    assert len(corpus.alignment("empty", 0.0, 1.0)) == 0
+    assert np.array_equal(corpus.audio("empty"), audio)
+
+
+def test_append_resumes_last_shard(tmp_path):
+    first, second = make_piece(3, 4, seed=1), make_piece(3, 4, seed=2)
+    with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+        writer.add("first", *first)
+    with pytest.raises(FileExistsError):
+        ShardWriter(str(tmp_path), sample_rate=SR)
+    with ShardWriter(str(tmp_path), sample_rate=SR, append=True) as writer:
+        writer.add("second", *second)
+
+    corpus = ShardedCorpus(str(tmp_path))
+    assert corpus.pieces["second"]["shard"] == 0
+    assert np.array_equal(corpus.audio("first"), first[0])
+    assert np.array_equal(corpus.audio("second"), second[0])
+    assert np.array_equal(corpus.alignment("second"), second[3])
+
+
+def test_failed_export_writes_no_index(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+            writer.add("a", *make_piece(2, 3))
+            raise RuntimeError("boom")
+    assert not os.path.exists(tmp_path / INDEX_NAME)
+
+
+def test_append_drops_bytes_from_crashed_run(tmp_path):
+    first, second = make_piece(3, 4, seed=1), make_piece(3, 4, seed=2)
+    with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+        writer.add("first", *first)
+    with pytest.raises(RuntimeError):
+        with ShardWriter(str(tmp_path), sample_rate=SR, append=True) as writer:
+            writer.add("lost", *make_piece(5, 6, seed=3))
+            raise RuntimeError("boom")
+    with ShardWriter(str(tmp_path), sample_rate=SR, append=True) as writer:
+        writer.add("second", *second)
+
+    corpus = ShardedCorpus(str(tmp_path))
+    assert "lost" not in corpus
+    assert np.array_equal(corpus.audio("second"), second[0])
+
+
+def test_dtype_mismatch_is_rejected(tmp_path):
+    with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+        writer.add("a", *make_piece(1, 2))
+    path = tmp_path / INDEX_NAME
+    index = json.loads(path.read_text())
+    index["dtypes"]["audio"] = "<f8"
+    path.write_text(json.dumps(index))
+    with pytest.raises(ValueError):
+        ShardedCorpus(str(tmp_path))
+
+
+def test_unsorted_input_is_rejected(tmp_path):
+    audio, score, perf, align = make_piece(3, 4)
+    with ShardWriter(str(tmp_path), sample_rate=SR) as writer:
+        with pytest.raises(ValueError):
+            writer.add("notes", audio, score, perf[::-1], align)
+        with pytest.raises(ValueError):
+            writer.add("align", audio, score, perf, align[::-1])
+        writer.add("ok", audio, score, perf, align)
+    assert list(ShardedCorpus(str(tmp_path))) == ["ok"]
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+from instrument import PROFILE_ENV, Profiler
+
+
+@pytest.fixture
+def prof():
+    p = Profiler(sample_interval=0.01)
+    yield p
+    p.stop_sampling()
+
+
+def test_stage_aggregates_calls_and_counters(prof):
+    for n in (1, 2, 3):
+        with prof.stage("work", items=n) as st:
+            st.add(nbytes=10 * n)
+    stats = prof.report()["stages"]["work"]
+    assert stats["calls"] == 3
+    assert stats["items"] == 6
+    assert stats["bytes"] == 60
+    assert stats["errors"] == 0
+    assert stats["min_s"] <= stats["mean_s"] <= stats["max_s"]
+    assert stats["mean_s"] == pytest.approx(stats["wall_s"] / 3, abs=1e-5)
+
+
+def test_stage_that_raises_counts_one_error(prof):
+    with pytest.raises(ValueError):
+        with prof.stage("boom"):
+            raise ValueError
+    with prof.stage("boom"):
+        pass
+    stats = prof.report()["stages"]["boom"]
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+
+
+def test_timed_and_count(prof):
+    @prof.timed()
+    def step():
+        prof.count("step", items=5)
+        return "done"
+
+    assert step() == "done"
+    stats = prof.report()["stages"]["step"]
+    assert stats["calls"] == 1
+    assert stats["items"] == 5
+
+
+def test_api_calls_add_up(prof):
+    prof.api_call("yt", quota=100, retries=0)
+    prof.api_call("yt", quota=100, retries=1)
+    prof.api_call("other", quota=1)
+    api = prof.report()["api"]
+    assert api["yt"] == {"calls": 2, "quota": 200, "retries": 1}
+    assert api["other"] == {"calls": 1, "quota": 1}
+
+
+def test_reset_clears_everything(prof):
+    with prof.stage("a"):
+        pass
+    prof.api_call("yt", quota=1)
+    prof.reset()
+    rep = prof.report()
+    assert rep["stages"] == {} and rep["api"] == {}
+
+
+def test_emit_to_path(prof, tmp_path, monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    prof.api_call("yt", quota=3)
+    out = tmp_path / "profile.json"
+    prof.emit(str(out))
+    assert json.loads(out.read_text())["api"]["yt"]["quota"] == 3
+
+
+def test_emit_uses_env_and_stderr(prof, tmp_path, monkeypatch):
+    out = tmp_path / "env.json"
+    monkeypatch.setenv(PROFILE_ENV, str(out))
+    prof.emit()
+    assert "stages" in json.loads(out.read_text())
+
+    monkeypatch.setenv(PROFILE_ENV, "-")
+    err = io.StringIO()
+    monkeypatch.setattr(sys, "stderr", err)
+    prof.emit()
+    assert "stages" in json.loads(err.getvalue())
+
+
+def test_emit_without_target_writes_nothing(prof, tmp_path, monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    monkeypatch.chdir(tmp_path)
+    assert "stages" in prof.emit()
+    assert os.listdir(tmp_path) == []
+
+
+def test_safe_execute_counts_retries(monkeypatch):
+    pytest.importorskip("googleapiclient")
+    pytest.importorskip("dateutil")
+    pytest.importorskip("pandas")
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(__file__), "..", "queryingmetadata"))
+    import youtube_query_batch as yqb
+
+    prof = Profiler()
+    monkeypatch.setattr(yqb, "profiler", prof)
+    monkeypatch.setattr(yqb.time, "sleep", lambda s: None)
+
+    class FlakyRequest:
+        calls = 0
+
+        def execute(self):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("dropped")
+            return {"items": []}
+
+    assert yqb.safe_execute(FlakyRequest(), api_name="youtube.search.list", quota=100) == {"items": []}
+    assert prof.api["youtube.search.list"] == {"calls": 2, "quota": 200, "retries": 1}
@@ -2,7 +2,7 @@ import time
 import random
 import re
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Iterable, List, Set, Tuple
 from urllib.parse import urljoin, urlparse
 
@@ -11,6 +11,20 @@ from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter, Retry
 import urllib.robotparser as robotparser
 
+try:
+    from instrument import profiler
+except ImportError:  # repo root not on PYTHONPATH: run without profiling
+    from contextlib import nullcontext
+
+    class _NoProfiler:
+        api = {}
+        def stage(self, *args, **kwargs): return nullcontext(self)
+        def timed(self, name=None): return lambda fn: fn
+        def add(self, *args, **kwargs): pass
+        count = api_call = emit = add
+
+    profiler = _NoProfiler()
+
 @dataclass
 class CrawlConfig:
     start_urls: List[str]
@@ -18,6 +32,8 @@ class CrawlConfig:
     user_agent: str = "EduCrawler/1.0 (+contact@example.edu)"
     max_pages: int = 300
     delay_range: Tuple[float, float] = (0.8, 2.0)  # seconds
+    # hosts whose pages go through parse_wikipedia_page
+    parse_domains: List[str] = field(default_factory=lambda: ["wikipedia.org"])
     timeout: int = 15
 
 def make_session(user_agent: str) -> requests.Session:
@@ -85,6 +101,12 @@ def respectful_sleep(cfg: CrawlConfig):
     time.sleep(random.uniform(*cfg.delay_range))
 
 def crawl(cfg: CrawlConfig) -> List[dict]:
+    with profiler.stage("crawl") as st:
+        results = _crawl(cfg)
+        st.add(items=len(results))
+    return results
+
+def _crawl(cfg: CrawlConfig) -> List[dict]:
     session = make_session(cfg.user_agent)
     to_visit: List[str] = list(cfg.start_urls)
     seen: Set[str] = set()
@@ -96,25 +118,30 @@ def crawl(cfg: CrawlConfig) -> List[dict]:
             continue
         if not same_domain(url, cfg.allowed_domains):
             continue
-        if not can_fetch(url, cfg.user_agent):
+        with profiler.stage("crawl.robots"):
+            allowed = can_fetch(url, cfg.user_agent)
+        if not allowed:
             continue
 
         try:
-            resp = session.get(url, timeout=cfg.timeout)
-            resp.raise_for_status()
+            with profiler.stage("crawl.fetch") as st:
+                resp = session.get(url, timeout=cfg.timeout)
+                resp.raise_for_status()
+                st.add(items=1, nbytes=len(resp.content))
         except requests.RequestException:
             continue
 
         html = resp.text
         seen.add(url)
 
-        # Example parser for Wikipedia pages
-        if "wikipedia.org" in url:
-            data = parse_wikipedia_page(url, html)
-            results.append(data)
+        with profiler.stage("crawl.parse", items=1, nbytes=len(html)):
+            # Example parser for Wikipedia pages
+            if same_domain(url, cfg.parse_domains):
+                data = parse_wikipedia_page(url, html)
+                results.append(data)
 
-        # Frontier expansion from category or content pages
-        links = extract_links(url, html)
+            # Frontier expansion from category or content pages
+            links = extract_links(url, html)
         for link in links:
             if same_domain(link, cfg.allowed_domains) and link not in seen:
                 # Keep exploration bounded to category and article space
@@ -140,3 +167,4 @@ if __name__ == "__main__":
         for row in data:
             f.write(json.dumps(row, ensure_ascii=False) + "\n")
     print(f"wrote {len(data)} rows to piano_wiki_crawl.jsonl")
+    profiler.emit()